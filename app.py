@@ -3,12 +3,14 @@
 import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
+import asyncio # Concurrent LLM calls
 import os
 import time # For progress simulation
 
 # Import database and LLM utilities
-from db_utils import add_keyword_grouping, get_existing_grouping, get_all_data
-from llm_utils import get_llm_grouping
+from db_utils import add_keyword_groupings_bulk, get_existing_groupings_bulk, get_grouping_embeddings, get_all_data, get_row_count
+from embedding_utils import embeddings_available, encode_keywords, embedding_to_blob, find_semantic_matches
+from llm_utils import aget_llm_grouping_batch, submit_batch_openai, get_batch_status_openai, fetch_batch_results_openai, LLM_MODEL_MAP
 
 # Import specific functions from utils
 from utils import parse_keywords, get_language_list # Import base function
@@ -16,6 +18,30 @@ from utils import parse_keywords, get_language_list # Import base function
 # Load environment variables FROM .env file in the same directory
 load_dotenv()
 
+# Max number of in-flight LLM requests. The calls are network-bound, so running
+# them concurrently (bounded by a semaphore) is where almost all the speedup
+# on cache misses comes from. Override via LLM_CONCURRENCY in .env.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+
+# How many keywords to pack into a single LLM call (batch prompting). The
+# fixed instruction block dominates the prompt, so one call for N keywords
+# costs far fewer tokens and round-trips than N calls for one keyword each.
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "10"))
+
+# Minimum cosine similarity for the semantic cache to reuse a stored grouping
+# for a near-duplicate keyword (e.g. "running shoe" vs "running shoes").
+SEMANTIC_SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_SIMILARITY_THRESHOLD", "0.95"))
+
+# Model choices offered per provider, cheapest/fastest first. The defaults in
+# LLM_MODEL_MAP (small tiers) are plenty for this classification task; the
+# flagship models cost ~10-20x more for the same output quality here.
+MODEL_OPTIONS = {
+    "OpenAI": ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo-preview"],
+    "Claude": ["claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022", "claude-3-opus-20240229"],
+    "Gemini": ["gemini-1.5-flash", "gemini-1.5-pro-latest", "gemini-pro"],
+    "Mistral": ["mistral-small-latest", "mistral-large-latest", "mistralai/Mistral-7B-Instruct-v0.1"],
+}
+
 # --- App Configuration ---
 st.set_page_config(page_title="Semantic Keyword Grouper", layout="wide")
 st.title("🧠 Semantic Keyword Grouper")
@@ -35,8 +61,69 @@ def generate_language_options():
 @st.cache_data # Cache the CSV conversion - DEFINED IN APP.PY
 def convert_df_to_csv(df: pd.DataFrame) -> bytes:
    """Converts DataFrame to CSV bytes, ready for download."""
-   # This function now exists within the Streamlit script's context
-   return df.to_csv(index=False).encode('utf-8')
+   # pyarrow's CSV writer serializes columns in vectorized C++ instead of
+   # pandas' row-by-row Python string formatting — a big win on full exports
+   try:
+       import pyarrow as pa
+       import pyarrow.csv as pacsv
+       buf = pa.BufferOutputStream()
+       pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+       return buf.getvalue().to_pybytes()
+   except ImportError:
+       return df.to_csv(index=False).encode('utf-8')
+
+# Column order for the results view (SoA: results are stored column-wise)
+RESULT_COLUMNS = ('main_cat', 'sub_cat_1', 'sub_cat_2', 'keyword', 'language', 'semantic_theme', '_source')
+
+def rows_to_results_table(rows):
+    """Converts buffered result-row dicts into a columnar table.
+
+    Built once per run and stored in session state, so Streamlit reruns reuse
+    the typed Arrow columns instead of re-parsing a list of dicts into a
+    DataFrame on every interaction. st.dataframe renders Arrow tables
+    natively; falls back to pandas when pyarrow is unavailable.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        # from_records with explicit columns skips dtype inference over dicts
+        return pd.DataFrame.from_records(rows, columns=RESULT_COLUMNS)
+    # Single pass over the row dicts instead of one scan per column
+    columns = {col: [] for col in RESULT_COLUMNS}
+    for row in rows:
+        for col in RESULT_COLUMNS:
+            columns[col].append(row.get(col, ''))
+    return pa.table(columns)
+
+def expand_variant_rows(rows, variants_by_norm):
+    """Fans grouping rows back out to collapsed case/whitespace variants.
+
+    Processing collapses "Running  Shoes"/"running shoes" to one
+    representative; this restores a row for every original input keyword.
+    """
+    expanded = []
+    for row in rows:
+        norm = " ".join(row["keyword"].lower().split())
+        for variant in variants_by_norm.get(norm, [row["keyword"]]):
+            if variant == row["keyword"]:
+                expanded.append(row)
+            else:
+                duplicate = dict(row)
+                duplicate["keyword"] = variant
+                expanded.append(duplicate)
+    return expanded
+
+def append_rows_to_results(rows):
+    """Appends new result rows to the stored results table."""
+    new_table = rows_to_results_table(rows)
+    if st.session_state.results is None or len(st.session_state.results) == 0:
+        st.session_state.results = new_table
+        return
+    try:
+        import pyarrow as pa
+        st.session_state.results = pa.concat_tables([st.session_state.results, new_table])
+    except ImportError:
+        st.session_state.results = pd.concat([st.session_state.results, new_table], ignore_index=True)
 
 # --- Global Variables & Session State ---
 # Initialize session state variables if they don't exist to persist across reruns
@@ -46,6 +133,8 @@ if 'results' not in st.session_state:
     st.session_state.results = None # Stores results of the last processing run
 if 'error_message' not in st.session_state:
     st.session_state.error_message = None # Stores general error messages
+if 'batch_job' not in st.session_state:
+    st.session_state.batch_job = None # Pending Batch API job: (batch_id, keywords, language, prompt, variants_by_norm)
 
 # --- Sidebar for Configuration ---
 with st.sidebar:
@@ -60,6 +149,21 @@ with st.sidebar:
         help="Select the Large Language Model to use for grouping."
         )
 
+    # Model Selection (per provider). The choice lives in this session's
+    # widget state (keyed per provider) and is passed through to the call
+    # layer; LLM_MODEL_MAP is shared across sessions and never mutated.
+    model_options = list(MODEL_OPTIONS[selected_llm])
+    default_model = LLM_MODEL_MAP[selected_llm]
+    if default_model not in model_options: # e.g. a custom model from .env
+        model_options.insert(0, default_model)
+    selected_model = st.selectbox(
+        "Model:",
+        model_options,
+        index=model_options.index(default_model),
+        key=f"model_{selected_llm}", # Per-session, remembered per provider
+        help="Smaller/faster tiers are listed first and are usually sufficient for keyword classification."
+    )
+
     # API Key Input (Commented out - prefer .env but kept for reference)
     # st.info("API keys should ideally be set in your .env file.")
     # api_key_input = st.text_input(f"Enter {selected_llm} API Key (if not in .env)", type="password")
@@ -155,6 +259,16 @@ else: # Paste Keywords
 st.header("2. Process Keywords")
 st.markdown("Click the button below to start grouping the provided keywords using the selected LLM and prompt.")
 
+# Batch mode sends all cache-miss keywords to the provider's Batch API in one
+# job (~50% cheaper) instead of live calls. Results are fetched later via the
+# status check below. Currently supported for OpenAI only.
+batch_mode = st.checkbox(
+    "Batch mode (cheaper, async)",
+    value=False,
+    help="Submit cache misses as one OpenAI Batch API job (50% cheaper). "
+         "Results are not immediate; use the 'Check Batch Status' button to collect them."
+)
+
 # Disable button if already processing, if there are no keywords, or if there was an input error
 process_button_disabled = st.session_state.processing or not keywords_to_process or input_error is not None
 
@@ -167,9 +281,23 @@ if st.button("✨ Group Keywords Semantically ✨", disabled=process_button_disa
     else:
         # --- Start Processing ---
         st.session_state.processing = True
-        st.session_state.results = [] # Clear previous results
+        st.session_state.results = None # Cleared; a fresh table is built at the end of the run
         st.session_state.error_message = None # Clear previous general errors
-        total_keywords = len(keywords_to_process)
+
+        # Collapse case/whitespace variants before any cache or LLM work:
+        # "Running  Shoes" and "running shoes" share one grouping, so only one
+        # representative per normalized form is processed and the result is
+        # fanned back out to every original variant afterwards.
+        variants_by_norm = {}
+        for kw in keywords_to_process:
+            norm = " ".join(kw.lower().split())
+            variants_by_norm.setdefault(norm, []).append(kw)
+        representatives = [variants[0] for variants in variants_by_norm.values()]
+        collapsed_count = len(keywords_to_process) - len(representatives)
+        if collapsed_count:
+            st.info(f"ℹ️ Collapsed {collapsed_count} case/whitespace duplicate(s); processing {len(representatives)} distinct keywords.")
+
+        total_keywords = len(representatives)
         processed_count = 0
         errors = 0
         llm_calls = 0
@@ -182,22 +310,24 @@ if st.button("✨ Group Keywords Semantically ✨", disabled=process_button_disa
 
         start_time = time.time()
 
-        # --- Keyword Processing Loop ---
-        for i, keyword in enumerate(keywords_to_process):
-            current_progress = (i + 1) / total_keywords
-            status_text.text(f"⚙️ Processing keyword {i+1}/{total_keywords}: '{keyword}' (Cache Hits: {cache_hits}, LLM Calls: {llm_calls}, Errors: {errors})")
-            progress_bar.progress(current_progress)
-
-            # 1. Check Cache (Database) first to save API calls and ensure reliability
-            try:
-                existing = get_existing_grouping(keyword, selected_language, custom_prompt)
-            except Exception as db_err:
-                 st.error(f"Database error checking cache for '{keyword}': {db_err}")
-                 errors += 1
-                 # Optionally add placeholder error result
-                 st.session_state.results.append({"keyword": keyword, "language": selected_language, "main_cat": "DB_ERROR", "sub_cat_1": "DB_ERROR", "sub_cat_2": "DB_ERROR", "semantic_theme": f"DB Check Error: {db_err}"})
-                 continue # Skip to next keyword
-
+        # Rows are buffered locally and flushed into st.session_state at the
+        # end of the run; widget writes are also throttled below. Both avoid
+        # O(N) Streamlit render/diff callbacks per run.
+        results_buffer = []
+
+        # --- Phase 1: Bulk cache lookup (one query for all keywords) ---
+        # A single WHERE ... IN query replaces N per-keyword statements; hits
+        # are resolved immediately and misses go to the LLM phase below.
+        status_text.text(f"🔎 Checking cache for {total_keywords} keywords...")
+        try:
+            cached_groupings = get_existing_groupings_bulk(representatives, selected_language, custom_prompt)
+        except Exception as db_err:
+            st.error(f"Database error checking cache: {db_err}. Treating all keywords as cache misses.")
+            cached_groupings = {}
+
+        cache_misses = []
+        for keyword in representatives:
+            existing = cached_groupings.get(keyword)
             if existing:
                 # Cache Hit! Use existing data
                 cache_hits += 1
@@ -210,63 +340,168 @@ if st.button("✨ Group Keywords Semantically ✨", disabled=process_button_disa
                     "semantic_theme": existing.get('semantic_theme', 'N/A'),
                     "_source": "cache" # Add metadata for clarity
                 }
-                st.session_state.results.append(grouping_data)
+                results_buffer.append(grouping_data)
                 processed_count += 1
             else:
-                # 2. Cache Miss: Call LLM
-                llm_calls += 1
+                # Cache Miss: queue for the concurrent LLM phase below
+                cache_misses.append(keyword)
+
+        # --- Phase 1b: Semantic cache for the remaining misses ---
+        # Embed the miss keywords and reuse stored groupings for near
+        # duplicates (cosine similarity >= threshold). The embeddings are kept
+        # so phase 3 can store them alongside any new LLM results.
+        miss_embeddings = {}
+        if cache_misses and embeddings_available():
+            try:
+                status_text.text(f"🧭 Semantic cache check for {len(cache_misses)} keywords...")
+                vectors = encode_keywords(cache_misses)
+                miss_embeddings = dict(zip(cache_misses, vectors))
+                stored_rows = get_grouping_embeddings(selected_language, custom_prompt)
+                semantic_hits = find_semantic_matches(miss_embeddings, stored_rows, SEMANTIC_SIMILARITY_THRESHOLD)
+            except Exception as sem_err:
+                st.warning(f"⚠️ Semantic cache unavailable ({sem_err}); continuing with exact-match cache only.")
+                semantic_hits = {}
+
+            for keyword, match in semantic_hits.items():
+                cache_hits += 1
+                processed_count += 1
+                results_buffer.append({
+                    "keyword": keyword, "language": selected_language,
+                    "main_cat": match['main_cat'], "sub_cat_1": match['sub_cat_1'],
+                    "sub_cat_2": match['sub_cat_2'], "semantic_theme": match['semantic_theme'],
+                    "_source": "semantic_cache"
+                })
+            if semantic_hits:
+                cache_misses = [kw for kw in cache_misses if kw not in semantic_hits]
+
+        phase1_done = cache_hits + errors
+        progress_bar.progress(phase1_done / total_keywords if total_keywords else 0.0)
+
+        # --- Batch mode: enqueue one Batch API job instead of live calls ---
+        if batch_mode and cache_misses:
+            if selected_llm != "OpenAI":
+                st.warning("⚠️ Batch mode currently supports OpenAI only. Falling back to live calls.")
+            else:
                 try:
-                    # Add a small delay to be kind to APIs, prevent rate limits
-                    time.sleep(0.5) # Adjust as needed (0.5s to 1s is often safe)
-
-                    llm_result = get_llm_grouping(keyword, selected_language, selected_llm, custom_prompt)
-
-                    # 3. Parse LLM Response and Validate
-                    if llm_result and isinstance(llm_result, dict) and \
-                       'main_cat' in llm_result and 'sub_cat_1' in llm_result and \
-                       'sub_cat_2' in llm_result and 'semantic_theme' in llm_result:
-
-                        # Ensure all fields are populated strings (as requested in prompt instructions)
-                        main_cat = str(llm_result.get('main_cat', 'Uncategorized')).strip() or 'Uncategorized'
-                        sub_cat_1 = str(llm_result.get('sub_cat_1', 'General')).strip() or 'General'
-                        sub_cat_2 = str(llm_result.get('sub_cat_2', 'Detail')).strip() or 'Detail'
-                        semantic_theme = str(llm_result.get('semantic_theme', 'N/A')).strip() or 'N/A'
-
-                        # 4. Store valid result in DB
-                        try:
-                             add_keyword_grouping(
-                                 keyword, selected_language, custom_prompt,
-                                 main_cat, sub_cat_1, sub_cat_2, semantic_theme
-                             )
-                        except Exception as db_add_err:
-                             st.error(f"Database error saving result for '{keyword}': {db_add_err}")
-                             errors += 1
-                             # Still add to session results, but mark as DB error source
-                             st.session_state.results.append({"keyword": keyword, "language": selected_language, "main_cat": main_cat, "sub_cat_1": sub_cat_1, "sub_cat_2": sub_cat_2, "semantic_theme": semantic_theme, "_source": "llm_db_error"})
-                             continue # Skip adding to processed_count if DB save failed maybe? Or count it? Currently counted.
-
-                        # Add successful LLM result to session results
-                        grouping_data = {
-                            "keyword": keyword, "language": selected_language,
-                            "main_cat": main_cat, "sub_cat_1": sub_cat_1,
-                            "sub_cat_2": sub_cat_2, "semantic_theme": semantic_theme,
-                            "_source": "llm" # Add metadata
-                        }
-                        st.session_state.results.append(grouping_data)
-                        processed_count += 1
-
-                    else:
-                        # Handle invalid/incomplete LLM response
-                        st.warning(f"⚠️ LLM response for '{keyword}' was incomplete or not valid JSON. Check LLM logs/prompt. Response: {llm_result}")
-                        errors += 1
-                        st.session_state.results.append({"keyword": keyword, "language": selected_language, "main_cat": "LLM_ERROR", "sub_cat_1": "LLM_ERROR", "sub_cat_2": "LLM_ERROR", "semantic_theme": f"Invalid/Incomplete LLM Response: {str(llm_result)[:100]}...", "_source": "llm_error"})
-
+                    batch_id = submit_batch_openai(cache_misses, selected_language, custom_prompt, model=selected_model)
+                    # Keep the variants map so collapsed duplicates can be
+                    # fanned back out when the batch results are collected
+                    st.session_state.batch_job = (batch_id, cache_misses, selected_language, custom_prompt, variants_by_norm)
+                    status_text.info(f"📦 Batch job '{batch_id}' submitted for {len(cache_misses)} keywords. Use 'Check Batch Status' below to collect results.")
+                except Exception as batch_err:
+                    st.error(f"❌ Failed to submit batch job: {batch_err}")
+                # Flush cache hits, expanded to the collapsed variants too
+                if collapsed_count:
+                    results_buffer = expand_variant_rows(results_buffer, variants_by_norm)
+                st.session_state.results = rows_to_results_table(results_buffer)
+                st.session_state.processing = False
+                st.stop() # Done for this run; results arrive via the status check
+
+        # --- Phase 2: Concurrent, batched LLM calls for the cache misses ---
+        # Misses are packed into chunks of LLM_BATCH_SIZE keywords per call
+        # (one shared instruction block per chunk) and the chunks are fanned
+        # out concurrently, bounded by a semaphore.
+
+        async def process_chunk(chunk, sem):
+            """Classifies one chunk of keywords in a single LLM call."""
+            async with sem:
+                try:
+                    # Rate limiting happens in llm_utils via per-provider
+                    # token buckets (see *_RPM in .env), not a fixed sleep
+                    results = await aget_llm_grouping_batch(chunk, selected_language, selected_llm, custom_prompt, model=selected_model)
+                    return chunk, results, None
                 except Exception as e:
-                    # Handle errors during the LLM call itself
-                    st.error(f"❌ Error processing keyword '{keyword}' with {selected_llm}: {e}")
-                    errors += 1
-                    st.session_state.results.append({"keyword": keyword, "language": selected_language, "main_cat": "LLM_ERROR", "sub_cat_1": "LLM_ERROR", "sub_cat_2": "LLM_ERROR", "semantic_theme": f"API/Processing Error: {e}", "_source": "llm_error"})
+                    return chunk, None, e
+
+        async def run_llm_calls(keywords):
+            """Fans out all chunked LLM calls and updates progress as they complete."""
+            sem = asyncio.Semaphore(LLM_CONCURRENCY)
+            chunks = [keywords[i:i + LLM_BATCH_SIZE] for i in range(0, len(keywords), LLM_BATCH_SIZE)]
+            tasks = [asyncio.ensure_future(process_chunk(chunk, sem)) for chunk in chunks]
+            outcomes = {}
+            completed = 0
+            # Widget writes each trigger a render/diff step, so cap the run at
+            # ~50 updates rather than one per completion
+            update_every = max(1, len(keywords) // 50)
+            last_shown = 0
+            for future in asyncio.as_completed(tasks):
+                chunk, results, call_error = await future
+                for kw in chunk:
+                    outcomes[kw] = ((results or {}).get(kw), call_error)
+                completed += len(chunk)
+                if completed - last_shown >= update_every or completed == len(keywords):
+                    last_shown = completed
+                    status_text.text(f"⚙️ LLM keywords {completed}/{len(keywords)} done (Cache Hits: {cache_hits}, Errors: {errors})")
+                    progress_bar.progress((phase1_done + completed) / total_keywords)
+            return outcomes
+
+        llm_calls = len(cache_misses)
+        llm_outcomes = asyncio.run(run_llm_calls(cache_misses)) if cache_misses else {}
+
+        # --- Phase 3: Validate and collect LLM results (input order) ---
+        # Valid results are accumulated and flushed to the DB in one
+        # transaction at the end instead of a commit per keyword.
+        pending_inserts = []
+        for keyword in cache_misses:
+            llm_result, call_error = llm_outcomes[keyword]
+
+            if call_error is not None:
+                # Handle errors during the LLM call itself
+                st.error(f"❌ Error processing keyword '{keyword}' with {selected_llm}: {call_error}")
+                errors += 1
+                results_buffer.append({"keyword": keyword, "language": selected_language, "main_cat": "LLM_ERROR", "sub_cat_1": "LLM_ERROR", "sub_cat_2": "LLM_ERROR", "semantic_theme": f"API/Processing Error: {call_error}", "_source": "llm_error"})
+                continue
+
+            # Parse LLM Response and Validate
+            if llm_result and isinstance(llm_result, dict) and \
+               'main_cat' in llm_result and 'sub_cat_1' in llm_result and \
+               'sub_cat_2' in llm_result and 'semantic_theme' in llm_result:
+
+                # Ensure all fields are populated strings (as requested in prompt instructions)
+                main_cat = str(llm_result.get('main_cat', 'Uncategorized')).strip() or 'Uncategorized'
+                sub_cat_1 = str(llm_result.get('sub_cat_1', 'General')).strip() or 'General'
+                sub_cat_2 = str(llm_result.get('sub_cat_2', 'Detail')).strip() or 'Detail'
+                semantic_theme = str(llm_result.get('semantic_theme', 'N/A')).strip() or 'N/A'
+
+                # Queue the valid result for the bulk DB insert below; store
+                # the embedding too so the semantic cache keeps growing
+                keyword_vector = miss_embeddings.get(keyword)
+                embedding_blob = embedding_to_blob(keyword_vector) if keyword_vector is not None else None
+                pending_inserts.append((keyword, selected_language, custom_prompt,
+                                        main_cat, sub_cat_1, sub_cat_2, semantic_theme, embedding_blob))
+
+                # Add successful LLM result to session results
+                grouping_data = {
+                    "keyword": keyword, "language": selected_language,
+                    "main_cat": main_cat, "sub_cat_1": sub_cat_1,
+                    "sub_cat_2": sub_cat_2, "semantic_theme": semantic_theme,
+                    "_source": "llm" # Add metadata
+                }
+                results_buffer.append(grouping_data)
+                processed_count += 1
+
+            else:
+                # Handle invalid/incomplete LLM response
+                st.warning(f"⚠️ LLM response for '{keyword}' was incomplete or not valid JSON. Check LLM logs/prompt. Response: {llm_result}")
+                errors += 1
+                results_buffer.append({"keyword": keyword, "language": selected_language, "main_cat": "LLM_ERROR", "sub_cat_1": "LLM_ERROR", "sub_cat_2": "LLM_ERROR", "semantic_theme": f"Invalid/Incomplete LLM Response: {str(llm_result)[:100]}...", "_source": "llm_error"})
+
+
+        # Fan results back out to the collapsed case/whitespace variants so
+        # every original input keyword appears in the output
+        if collapsed_count:
+            results_buffer = expand_variant_rows(results_buffer, variants_by_norm)
 
+        # Build the columnar results table for this run in one go
+        st.session_state.results = rows_to_results_table(results_buffer)
+
+        # Flush all new groupings to the DB in one transaction
+        if pending_inserts:
+            try:
+                add_keyword_groupings_bulk(pending_inserts)
+            except Exception as db_add_err:
+                st.error(f"Database error saving {len(pending_inserts)} results: {db_add_err}")
+                errors += 1
 
         # --- Processing Finished ---
         end_time = time.time()
@@ -280,14 +515,11 @@ if st.button("✨ Group Keywords Semantically ✨", disabled=process_button_disa
 # Display results from the latest run (if any)
 if st.session_state.results is not None: # Check if results exist in state
     st.header("3. Grouping Results (Latest Run)")
-    if st.session_state.results: # Check if the results list is not empty
-        results_df = pd.DataFrame(st.session_state.results)
-        # Define desired column order, including the _source metadata if needed
-        display_cols = ['main_cat', 'sub_cat_1', 'sub_cat_2', 'keyword', 'language', 'semantic_theme', '_source']
-        # Filter out columns that might not exist if _source wasn't added in all cases
-        display_cols = [col for col in display_cols if col in results_df.columns]
-        st.dataframe(results_df[display_cols])
-        st.caption(f"Displaying {len(results_df)} results from the last processing run.")
+    if len(st.session_state.results): # Check if the results table is not empty
+        # st.dataframe consumes the Arrow table directly (no pandas roundtrip);
+        # columns are already in RESULT_COLUMNS order
+        st.dataframe(st.session_state.results)
+        st.caption(f"Displaying {len(st.session_state.results)} results from the last processing run.")
     elif not st.session_state.processing: # Only show 'no results' if not currently processing
         st.info("No results were generated in the last run, or only errors occurred.")
 
@@ -296,27 +528,114 @@ if st.session_state.error_message:
     st.error(st.session_state.error_message)
 
 
+# --- Pending Batch Job Section ---
+if st.session_state.batch_job:
+    batch_id, batch_keywords, batch_language, batch_prompt, batch_variants = st.session_state.batch_job
+    st.header("📦 Pending Batch Job")
+    st.markdown(f"Batch job `{batch_id}` covering {len(batch_keywords)} keywords is in flight.")
+
+    if st.button("🔍 Check Batch Status"):
+        try:
+            batch_status = get_batch_status_openai(batch_id)
+        except Exception as e:
+            st.error(f"❌ Failed to check batch status: {e}")
+            batch_status = None
+
+        batch_results = None
+        if batch_status == "completed":
+            try:
+                with st.spinner("Fetching batch results..."):
+                    batch_results = fetch_batch_results_openai(batch_id, batch_keywords)
+            except Exception as fetch_err:
+                # Keep st.session_state.batch_job so the fetch can be retried
+                st.error(f"❌ Failed to fetch batch results: {fetch_err}. The job is kept; check the status again to retry.")
+
+        if batch_results is not None:
+            batch_rows = [] # Appended to the results table in one go below
+            batch_errors = 0
+            batch_inserts = []
+            for keyword in batch_keywords:
+                llm_result = batch_results.get(keyword)
+                # Same validation as the live path: require all four fields
+                if llm_result and isinstance(llm_result, dict) and \
+                   'main_cat' in llm_result and 'sub_cat_1' in llm_result and \
+                   'sub_cat_2' in llm_result and 'semantic_theme' in llm_result:
+                    main_cat = str(llm_result.get('main_cat', 'Uncategorized')).strip() or 'Uncategorized'
+                    sub_cat_1 = str(llm_result.get('sub_cat_1', 'General')).strip() or 'General'
+                    sub_cat_2 = str(llm_result.get('sub_cat_2', 'Detail')).strip() or 'Detail'
+                    semantic_theme = str(llm_result.get('semantic_theme', 'N/A')).strip() or 'N/A'
+                    batch_inserts.append((keyword, batch_language, batch_prompt,
+                                          main_cat, sub_cat_1, sub_cat_2, semantic_theme, None))
+                    batch_rows.append({
+                        "keyword": keyword, "language": batch_language,
+                        "main_cat": main_cat, "sub_cat_1": sub_cat_1,
+                        "sub_cat_2": sub_cat_2, "semantic_theme": semantic_theme,
+                        "_source": "batch"
+                    })
+                else:
+                    batch_errors += 1
+                    batch_rows.append({"keyword": keyword, "language": batch_language, "main_cat": "LLM_ERROR", "sub_cat_1": "LLM_ERROR", "sub_cat_2": "LLM_ERROR", "semantic_theme": f"Invalid/Incomplete Batch Response: {str(llm_result)[:100]}...", "_source": "batch_error"})
+
+            # Fan out to the collapsed case/whitespace variants, then append
+            # the collected rows to the results table in one go
+            append_rows_to_results(expand_variant_rows(batch_rows, batch_variants))
+
+            # Flush collected batch results to the DB in one transaction
+            if batch_inserts:
+                try:
+                    add_keyword_groupings_bulk(batch_inserts)
+                except Exception as db_add_err:
+                    st.error(f"Database error saving {len(batch_inserts)} batch results: {db_add_err}")
+                    batch_errors += 1
+
+            st.session_state.batch_job = None # Job collected
+            st.success(f"✅ Batch results collected: {len(batch_keywords) - batch_errors} ok, {batch_errors} errors.")
+            st.rerun()
+        elif batch_status is not None and batch_status != "completed":
+            st.info(f"⏳ Batch job status: '{batch_status}'. Check again later.")
+
+
 # --- Database Explorer Section ---
 st.header("📊 Database Explorer")
 st.markdown("View and export all grouped keywords currently stored in the database.")
 
+# Cached page fetches, keyed on row_count so inserts invalidate the cache
+@st.cache_data(ttl=60)
+def load_db_page(limit, offset, row_count):
+    """Fetches one Database Explorer page (row_count only busts the cache)."""
+    return get_all_data(limit=limit, offset=offset)
+
+@st.cache_data(ttl=60)
+def load_full_db(row_count):
+    """Fetches the entire table for the CSV export (row_count busts the cache)."""
+    return get_all_data(limit=None)
+
 # Add a refresh button for the database view
 if st.button("🔄 Refresh Database View"):
     # Clear specific caches if needed, though Streamlit usually handles reruns well
-    # get_all_data might benefit from @st.cache_data in db_utils if reads are slow & frequent
     st.rerun() # Rerun the script to fetch fresh data
 
 try:
-    # Fetch all data from the database
-    all_db_data = get_all_data() # This function is in db_utils.py
-
-    if not all_db_data.empty:
+    total_rows = get_row_count()
+
+    if total_rows:
+        # Pagination controls: only one page is read per rerun, so the view
+        # stays constant-time no matter how large the database grows
+        page_col, size_col = st.columns(2)
+        with size_col:
+            page_size = st.selectbox("Rows per page:", (100, 500, 1000), index=0, key="db_page_size")
+        total_pages = (total_rows + page_size - 1) // page_size
+        with page_col:
+            page_number = st.number_input("Page:", min_value=1, max_value=total_pages, value=1, key="db_page_number")
+
+        all_db_data = load_db_page(page_size, (page_number - 1) * page_size, total_rows)
         st.dataframe(all_db_data, use_container_width=True)
-        st.caption(f"Total records in database: {len(all_db_data)}")
+        first_row = (page_number - 1) * page_size + 1
+        st.caption(f"Showing rows {first_row}-{first_row + len(all_db_data) - 1} of {total_rows} records (newest first).")
 
         # CSV Export Button for the *entire* database
         st.subheader("Export Full Database")
-        csv_data = convert_df_to_csv(all_db_data) # Calls the cached function defined in app.py
+        csv_data = convert_df_to_csv(load_full_db(total_rows)) # Calls the cached function defined in app.py
 
         # Get database name from environment or use default for filename
         db_file_name_base = os.getenv("DATABASE_NAME", "keyword_groups.db").split('.')[0]
@@ -4,15 +4,42 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 import hashlib # To hash the prompt for consistency check
+from functools import lru_cache
 
 load_dotenv()
 DB_NAME = os.getenv("DATABASE_NAME", "keyword_groups.db")
 
+# Reused SQL strings so sqlite3's per-connection statement cache serves the
+# same prepared statement on every call instead of re-parsing the SQL.
+_SELECT_GROUPING_SQL = (
+    "SELECT main_cat, sub_cat_1, sub_cat_2, semantic_theme FROM keyword_groups "
+    "WHERE keyword = ? AND language = ? AND prompt_hash = ?"
+)
+_INSERT_GROUPING_SQL = (
+    "INSERT OR IGNORE INTO keyword_groups "
+    "(keyword, language, prompt_hash, main_cat, sub_cat_1, sub_cat_2, semantic_theme, date_added, embedding) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# One long-lived connection shared by the whole app. Opening and closing a
+# fresh connection per call costs a connect + statement re-parse per keyword,
+# which dominates the (majority) cache-hit path on repeat runs.
+_conn = None
+
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row # Return rows as dictionary-like objects
-    return conn
+    """Returns the shared SQLite connection, creating and tuning it on first use."""
+    global _conn
+    if _conn is None:
+        # check_same_thread=False: Streamlit may touch the DB from rerun threads
+        _conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+        _conn.row_factory = sqlite3.Row # Return rows as dictionary-like objects
+        # WAL lets readers run alongside the writer; NORMAL sync skips the
+        # full fsync per commit (still durable enough for a local cache DB).
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute("PRAGMA temp_store=MEMORY")
+        _conn.execute("PRAGMA cache_size=-64000") # 64MB page cache
+    return _conn
 
 def init_db():
     """Initializes the database table if it doesn't exist."""
@@ -29,54 +56,121 @@ def init_db():
             sub_cat_2 TEXT NOT NULL,
             semantic_theme TEXT NOT NULL,
             date_added TEXT NOT NULL,
+            embedding BLOB, -- Optional keyword embedding for the semantic cache
             UNIQUE(keyword, language, prompt_hash) -- Ensure reliability for a given prompt
         )
     ''')
+    # Note: the UNIQUE constraint above already creates the covering index on
+    # (keyword, language, prompt_hash), so lookups need no extra index.
+    # Migration: databases created before the semantic cache lack the column
+    try:
+        cursor.execute("ALTER TABLE keyword_groups ADD COLUMN embedding BLOB")
+    except sqlite3.OperationalError:
+        pass # Column already exists
+    # Covering index for the newest-first Database Explorer pagination
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_date_desc ON keyword_groups(date_added DESC)")
     conn.commit()
-    conn.close()
 
+@lru_cache(maxsize=32)
 def get_prompt_hash(prompt_text):
-    """Generates a SHA-256 hash of the prompt text."""
+    """Generates a SHA-256 hash of the prompt text (memoized).
+
+    The prompt never changes within a run, so hashing it once per distinct
+    prompt beats re-encoding and re-hashing ~500 bytes on every DB call.
+    """
     return hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()
 
 def get_existing_grouping(keyword, language, prompt_text):
     """Checks if a keyword grouping exists for the given keyword, lang, and prompt."""
     conn = get_db_connection()
-    cursor = conn.cursor()
     prompt_hash = get_prompt_hash(prompt_text)
-    cursor.execute(
-        "SELECT main_cat, sub_cat_1, sub_cat_2, semantic_theme FROM keyword_groups WHERE keyword = ? AND language = ? AND prompt_hash = ?",
-        (keyword, language, prompt_hash)
-    )
-    result = cursor.fetchone()
-    conn.close()
+    result = conn.execute(_SELECT_GROUPING_SQL, (keyword, language, prompt_hash)).fetchone()
     return dict(result) if result else None
 
-def add_keyword_grouping(keyword, language, prompt_text, main_cat, sub_cat_1, sub_cat_2, semantic_theme):
-    """Adds a new keyword grouping to the database."""
+def get_existing_groupings_bulk(keywords, language, prompt_text):
+    """Looks up cached groupings for many keywords in a single query.
+
+    Returns a dict of keyword -> grouping dict containing only the cache hits;
+    keywords absent from the dict are cache misses.
+    """
+    if not keywords:
+        return {}
+    conn = get_db_connection()
+    prompt_hash = get_prompt_hash(prompt_text)
+    found = {}
+    # Stay under SQLite's bound-parameter limit for very large keyword lists
+    for start in range(0, len(keywords), 500):
+        chunk = keywords[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f"SELECT keyword, main_cat, sub_cat_1, sub_cat_2, semantic_theme FROM keyword_groups "
+            f"WHERE language = ? AND prompt_hash = ? AND keyword IN ({placeholders})",
+            (language, prompt_hash, *chunk)
+        ).fetchall()
+        found.update((row['keyword'], dict(row)) for row in rows)
+    return found
+
+def add_keyword_grouping(keyword, language, prompt_text, main_cat, sub_cat_1, sub_cat_2, semantic_theme, embedding=None):
+    """Adds a new keyword grouping to the database (duplicates are ignored)."""
     conn = get_db_connection()
-    cursor = conn.cursor()
     date_added = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     prompt_hash = get_prompt_hash(prompt_text)
-    try:
-        cursor.execute('''
-            INSERT INTO keyword_groups (keyword, language, prompt_hash, main_cat, sub_cat_1, sub_cat_2, semantic_theme, date_added)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (keyword, language, prompt_hash, main_cat, sub_cat_1, sub_cat_2, semantic_theme, date_added))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        # Keyword with this language and prompt hash already exists, handle if necessary (e.g., log it)
-        print(f"Warning: Attempted to add duplicate entry for Keyword: {keyword}, Lang: {language}, Prompt Hash: {prompt_hash[:8]}...")
-        pass # Or update if needed, but INSERT OR IGNORE/REPLACE might be better
-    finally:
-        conn.close()
-
-def get_all_data():
-    """Retrieves all data from the database."""
+    # INSERT OR IGNORE: the UNIQUE constraint silently drops duplicates, so no
+    # exception-driven duplicate handling is needed.
+    conn.execute(_INSERT_GROUPING_SQL,
+                 (keyword, language, prompt_hash, main_cat, sub_cat_1, sub_cat_2, semantic_theme, date_added, embedding))
+    conn.commit()
+
+def add_keyword_groupings_bulk(rows):
+    """Inserts many keyword groupings in a single transaction.
+
+    Each row is (keyword, language, prompt_text, main_cat, sub_cat_1,
+    sub_cat_2, semantic_theme, embedding) where embedding is an optional
+    serialized vector (or None). One executemany + commit replaces a
+    commit (and its fsync) per row.
+    """
+    if not rows:
+        return
+    conn = get_db_connection()
+    date_added = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    params = [
+        (keyword, language, get_prompt_hash(prompt_text), main_cat, sub_cat_1, sub_cat_2, semantic_theme, date_added, embedding)
+        for (keyword, language, prompt_text, main_cat, sub_cat_1, sub_cat_2, semantic_theme, embedding) in rows
+    ]
+    with conn: # One transaction for the whole batch
+        conn.executemany(_INSERT_GROUPING_SQL, params)
+
+def get_grouping_embeddings(language, prompt_text):
+    """Fetches all stored rows with embeddings for the semantic cache.
+
+    Returns sqlite3.Row objects with the grouping columns plus the embedding
+    blob, restricted to the given language and prompt so matches are only
+    reused within the same grouping context.
+    """
+    conn = get_db_connection()
+    prompt_hash = get_prompt_hash(prompt_text)
+    return conn.execute(
+        "SELECT keyword, main_cat, sub_cat_1, sub_cat_2, semantic_theme, embedding FROM keyword_groups "
+        "WHERE language = ? AND prompt_hash = ? AND embedding IS NOT NULL",
+        (language, prompt_hash)
+    ).fetchall()
+
+def get_row_count():
+    """Returns the total number of stored keyword groupings."""
+    conn = get_db_connection()
+    return conn.execute("SELECT COUNT(*) FROM keyword_groups").fetchone()[0]
+
+def get_all_data(limit=1000, offset=0):
+    """Retrieves one page of data from the database, newest first.
+
+    Paging keeps the Database Explorer constant-time as the table grows;
+    pass limit=None to fetch everything (e.g. for the CSV export).
+    """
     conn = get_db_connection()
-    df = pd.read_sql_query("SELECT main_cat, sub_cat_1, sub_cat_2, keyword, language, semantic_theme, date_added FROM keyword_groups ORDER BY date_added DESC", conn)
-    conn.close()
-    return df
+    query = "SELECT main_cat, sub_cat_1, sub_cat_2, keyword, language, semantic_theme, date_added FROM keyword_groups ORDER BY date_added DESC"
+    if limit is None:
+        return pd.read_sql_query(query, conn)
+    return pd.read_sql_query(query + " LIMIT ? OFFSET ?", conn, params=(limit, offset))
 
 # Initialize the database when this module is imported
-init_db()
\ No newline at end of file
+init_db()
@@ -0,0 +1,86 @@
+# embedding_utils.py
+# Semantic cache layer: real keyword lists are full of near-duplicates
+# ("running shoe" vs "running shoes") that the exact-match DB cache treats as
+# misses. We embed keywords with a small sentence-transformer and reuse a
+# stored grouping when cosine similarity clears a threshold, saving the LLM
+# round-trip entirely.
+
+import os
+
+import numpy as np
+
+# The embedding dependency is optional: without sentence-transformers the app
+# simply falls back to exact-match caching only.
+try:
+    from sentence_transformers import SentenceTransformer
+    _ST_AVAILABLE = True
+except ImportError:
+    _ST_AVAILABLE = False
+
+# Small, fast model; 384-dim float32 vectors
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+_model = None # Loaded lazily on first use (model load takes seconds)
+
+def embeddings_available():
+    """Whether the optional embedding dependency is installed."""
+    return _ST_AVAILABLE
+
+def _get_model():
+    """Loads the sentence-transformer model once and reuses it."""
+    global _model
+    if _model is None:
+        _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _model
+
+def encode_keywords(keywords):
+    """Encodes keywords into L2-normalized float32 vectors, shape (N, dim).
+
+    Normalizing up front means cosine similarity is a plain dot product later.
+    """
+    vectors = _get_model().encode(keywords, batch_size=64, show_progress_bar=False)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0 # Avoid division by zero for degenerate inputs
+    return vectors / norms
+
+def embedding_to_blob(vector):
+    """Serializes a float32 vector for storage in the embedding BLOB column."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def blob_to_embedding(blob):
+    """Deserializes an embedding BLOB back into a float32 vector."""
+    return np.frombuffer(blob, dtype=np.float32)
+
+def find_semantic_matches(keyword_embeddings, stored_rows, threshold=0.95):
+    """Matches cache-miss keywords against stored embeddings by cosine similarity.
+
+    keyword_embeddings: dict of keyword -> normalized vector (from encode_keywords).
+    stored_rows: rows with 'embedding' blobs plus the grouping columns
+                 (as returned by db_utils.get_grouping_embeddings).
+    Returns a dict of keyword -> grouping dict for every keyword whose best
+    stored neighbour scores >= threshold.
+    """
+    if not keyword_embeddings or not stored_rows:
+        return {}
+
+    keywords = list(keyword_embeddings.keys())
+    query_matrix = np.stack([keyword_embeddings[kw] for kw in keywords]) # (N, dim)
+    stored_matrix = np.stack([blob_to_embedding(row['embedding']) for row in stored_rows]) # (M, dim)
+
+    # Both sides are L2-normalized, so the dot product is cosine similarity
+    similarities = query_matrix @ stored_matrix.T # (N, M)
+    best_indices = similarities.argmax(axis=1)
+    best_scores = similarities[np.arange(len(keywords)), best_indices]
+
+    matches = {}
+    for keyword, best_idx, score in zip(keywords, best_indices, best_scores):
+        if score >= threshold:
+            row = stored_rows[int(best_idx)]
+            matches[keyword] = {
+                "main_cat": row["main_cat"],
+                "sub_cat_1": row["sub_cat_1"],
+                "sub_cat_2": row["sub_cat_2"],
+                "semantic_theme": row["semantic_theme"],
+            }
+    return matches
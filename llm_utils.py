@@ -1,141 +1,701 @@
 import os
+import re
 import json
+import atexit
+import asyncio
 from dotenv import load_dotenv
 
+# orjson parses in C, ~3-5x faster than the stdlib json module. It matters
+# here because response parsing is the CPU work squeezed between awaits in the
+# concurrent loop. Optional: falls back to stdlib json if not installed.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # Load API keys
 load_dotenv()
 
+# Token-bucket rate limiting: instead of a fixed sleep between calls (which
+# caps throughput regardless of provider limits), each provider gets an
+# AsyncLimiter budget in requests per minute, tunable via OPENAI_RPM,
+# GEMINI_RPM, CLAUDE_RPM and MISTRAL_RPM in .env. Optional: without
+# aiolimiter, concurrency is bounded only by the semaphore in app.py.
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    AsyncLimiter = None
+
+# Retry with jittered exponential backoff: a single transient 429/500 used to
+# lose the keyword and force re-running the whole batch, which is far more
+# expensive than a few retries. Optional: without tenacity, calls are made once.
+try:
+    from tenacity import (Retrying, AsyncRetrying, retry_if_exception_type,
+                          wait_random_exponential, stop_after_attempt)
+    _HAVE_TENACITY = True
+except ImportError:
+    _HAVE_TENACITY = False
+
+_TRANSIENT_ERRORS = None
+
+def _transient_api_errors():
+    """Returns the tuple of transient error types worth retrying.
+
+    Assembled lazily from whichever provider SDKs are installed: rate
+    limits, connection/timeout failures and 5xx-style internal errors.
+    Everything else (auth failures, 4xx, schema validation) fails fast
+    instead of burning up to five backoff attempts.
+    """
+    global _TRANSIENT_ERRORS
+    if _TRANSIENT_ERRORS is None:
+        errors = [TimeoutError, ConnectionError]
+        try:
+            import openai # Also covers the Mistral-compatible endpoint path
+            errors += [openai.RateLimitError, openai.APIConnectionError,
+                       openai.APITimeoutError, openai.InternalServerError]
+        except ImportError:
+            pass
+        try:
+            import anthropic
+            errors += [anthropic.RateLimitError, anthropic.APIConnectionError,
+                       anthropic.APITimeoutError, anthropic.InternalServerError]
+        except ImportError:
+            pass
+        try:
+            from google.api_core import exceptions as google_exceptions
+            errors += [google_exceptions.TooManyRequests, google_exceptions.ServiceUnavailable,
+                       google_exceptions.InternalServerError, google_exceptions.DeadlineExceeded]
+        except ImportError:
+            pass
+        _TRANSIENT_ERRORS = tuple(errors)
+    return _TRANSIENT_ERRORS
+
+def _retry_kwargs():
+    return dict(retry=retry_if_exception_type(_transient_api_errors()),
+                wait=wait_random_exponential(min=1, max=30), stop=stop_after_attempt(5), reraise=True)
+
+def _call_with_retries(fn, *args, **kwargs):
+    """Invokes an API call, retrying with jittered exponential backoff."""
+    if not _HAVE_TENACITY:
+        return fn(*args, **kwargs)
+    for attempt in Retrying(**_retry_kwargs()):
+        with attempt:
+            return fn(*args, **kwargs)
+
+async def _acall_with_retries(fn, *args, **kwargs):
+    """Async version of _call_with_retries."""
+    if not _HAVE_TENACITY:
+        return await fn(*args, **kwargs)
+    async for attempt in AsyncRetrying(**_retry_kwargs()):
+        with attempt:
+            return await fn(*args, **kwargs)
+
+# Optional provider failover: a comma-separated .env list (e.g.
+# LLM_FAILOVER="Claude,OpenAI") of providers to try, in order, when the
+# selected provider still fails after its retries.
+_FAILOVER_ORDER = [p.strip() for p in os.getenv("LLM_FAILOVER", "").split(",") if p.strip()]
+
+_RPM_ENV_DEFAULT = "300" # Conservative default; raise to match your tier
+_limiters = {}
+
+def _get_limiter(llm_choice):
+    """Returns the shared per-provider rate limiter (or None if unavailable)."""
+    if AsyncLimiter is None:
+        return None
+    if llm_choice not in _limiters:
+        rpm = int(os.getenv(f"{llm_choice.upper()}_RPM", _RPM_ENV_DEFAULT))
+        _limiters[llm_choice] = AsyncLimiter(rpm, 60)
+    return _limiters[llm_choice]
+
+# Shared HTTP/2 connection pool for the async LLM clients. Re-creating a
+# client per call pays TLS handshake + DNS lookup each time; under concurrency
+# a shared keep-alive pool saves ~30-100ms per request. (The Gemini SDK
+# manages its own transport and doesn't take an httpx client.)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# The pool and the SDK clients on top of it are scoped to the running event
+# loop: app.py starts a fresh loop per run (asyncio.run), and keep-alive
+# connections created on one loop raise "Event loop is closed" if reused on
+# the next. Pooling still pays off where it matters — across the many
+# concurrent calls within one run.
+_http_client = None
+_async_clients = {} # Provider name -> cached async SDK client
+_clients_loop = None # Event loop the cached clients were created on
+
+def _close_http_client():
+    if _http_client is not None:
+        try:
+            asyncio.run(_http_client.aclose())
+        except Exception:
+            pass # Interpreter is shutting down; best effort only
+
+def _check_clients_loop():
+    """Drops cached clients created on a previous (now closed) event loop."""
+    global _http_client, _clients_loop
+    loop = asyncio.get_running_loop()
+    if _clients_loop is not loop:
+        _http_client = None
+        _async_clients.clear()
+        _clients_loop = loop
+
+def _get_http_client():
+    """Returns the per-loop httpx.AsyncClient pool (or None without httpx)."""
+    global _http_client
+    if httpx is None:
+        return None
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            timeout=60.0,
+        )
+    return _http_client
+
+atexit.register(_close_http_client) # Close whichever pool is live at exit
+
+def _async_openai_client():
+    _check_clients_loop()
+    if "OpenAI" not in _async_clients:
+        from openai import AsyncOpenAI
+        _async_clients["OpenAI"] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"),
+                                               http_client=_get_http_client())
+    return _async_clients["OpenAI"]
+
+def _async_anthropic_client():
+    _check_clients_loop()
+    if "Claude" not in _async_clients:
+        from anthropic import AsyncAnthropic
+        _async_clients["Claude"] = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                                  http_client=_get_http_client())
+    return _async_clients["Claude"]
+
+def _async_mistral_client():
+    _check_clients_loop()
+    if "Mistral" not in _async_clients:
+        from openai import AsyncOpenAI
+        _async_clients["Mistral"] = AsyncOpenAI(
+            api_key=os.getenv("MISTRAL_API_KEY"), # Or specific key for the endpoint
+            base_url=os.getenv("MISTRAL_API_BASE_URL"), # e.g., "https://api.together.xyz/v1"
+            http_client=_get_http_client())
+    return _async_clients["Mistral"]
+
+# Matches the outermost {...} block in a response that has prose around the
+# JSON; compiled once, operates on bytes so orjson can parse the match directly.
+_JSON_BLOCK = re.compile(rb'\{.*\}', re.S)
+
+def _parse_json_from_llm(content):
+    """Extracts and parses the JSON object from an LLM response.
+
+    Tries a straight parse first (the common case with JSON modes enabled),
+    then falls back to locating the outermost brace block for models that wrap
+    the JSON in markdown or chatter. Returns None if nothing parses.
+    """
+    if not content:
+        return None
+    raw = content.encode('utf-8') if isinstance(content, str) else content
+    try:
+        return _loads(raw)
+    except Exception:
+        match = _JSON_BLOCK.search(raw)
+        if match:
+            try:
+                return _loads(match.group(0))
+            except Exception as json_e:
+                print(f"Error parsing JSON from LLM response: {json_e}. Content: {content[:200]}")
+                return None
+        print(f"Could not find JSON in LLM response: {content[:200]}")
+        return None
+
+# Default models per provider. The small/fast tiers are ~3-5x lower latency
+# and ~10-20x cheaper than the flagship models and are plenty for a 3-level
+# keyword classification. Override the defaults via .env; the sidebar model
+# selector in app.py is per-session and passed through the model= parameter
+# on each call (this map is shared across sessions, so it is never mutated).
+LLM_MODEL_MAP = {
+    "OpenAI": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+    "Claude": os.getenv("CLAUDE_MODEL", "claude-3-5-haiku-20241022"),
+    "Gemini": os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+    "Mistral": os.getenv("MISTRAL_MODEL", "mistral-small-latest"),
+}
+
+# JSON schemas for provider-native structured output. With these the model is
+# constrained to emit valid JSON matching the shape (OpenAI strict json_schema,
+# Gemini response_schema, Anthropic tool use), which removes the brace-scanning
+# repair path and the chatter tokens around the JSON. Mistral-compatible
+# endpoints generally lack schema support, so that path keeps the repair
+# fallback in _parse_json_from_llm.
+GROUPING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "main_cat": {"type": "string"},
+        "sub_cat_1": {"type": "string"},
+        "sub_cat_2": {"type": "string"},
+        "semantic_theme": {"type": "string"},
+    },
+    "required": ["main_cat", "sub_cat_1", "sub_cat_2", "semantic_theme"],
+    "additionalProperties": False,
+}
+
+BATCH_GROUPING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"index": {"type": "integer"}, **GROUPING_SCHEMA["properties"]},
+                "required": ["index"] + GROUPING_SCHEMA["required"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False,
+}
+
+def _openai_response_format(schema):
+    """Builds the response_format payload: strict schema if given, else JSON mode."""
+    if schema:
+        return {"type": "json_schema", "json_schema": {"name": "grouping", "schema": schema, "strict": True}}
+    return {"type": "json_object"}
+
+def _gemini_schema(schema):
+    """Returns a copy of the schema without JSON-Schema keys Gemini rejects.
+
+    google-generativeai's Schema proto has no additionalProperties field and
+    raises ValueError at request-build time if the key is present, so it is
+    stripped recursively before the schema is handed to GenerationConfig.
+    """
+    if isinstance(schema, dict):
+        return {k: _gemini_schema(v) for k, v in schema.items() if k != "additionalProperties"}
+    if isinstance(schema, list):
+        return [_gemini_schema(v) for v in schema]
+    return schema
+
 # Placeholder functions - Implement actual API calls here
 # Remember to add robust error handling (try-except blocks, retries) and JSON parsing
 
-def call_openai_api(prompt):
+# --- Prompt construction ---
+# The instruction block is identical for every keyword, so it goes into the
+# system message and only the tiny variable part ("Keyword: ... / Language:
+# ...") goes into the user message. That keeps the system prompt
+# byte-identical across calls, which makes it eligible for provider-side
+# prompt caching (automatic on OpenAI; explicit cache_control on Anthropic)
+# and cuts prefill cost/latency on the fixed ~500-token portion.
+
+def build_system_instructions(custom_prompt_template):
+    """Renders the user's template into a static instruction block.
+
+    The {keyword}/{language} placeholders are pointed at the user message so
+    the rendered instructions are identical for every call in a run.
+    """
+    return custom_prompt_template.format(
+        keyword="(see the user message)",
+        language="(see the user message)"
+    )
+
+def build_user_content(keyword, language):
+    """The per-call variable part of the prompt."""
+    return f"Keyword: '{keyword}'\nLanguage: {language}"
+
+def call_openai_api(instructions, user_content, schema=None, model=None):
     from openai import OpenAI
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    content = None
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview", # Or another suitable model
-            messages=[{"role": "user", "content": prompt}],
+        response = _call_with_retries(client.chat.completions.create,
+            model=model or LLM_MODEL_MAP["OpenAI"],
+            messages=[
+                {"role": "system", "content": instructions}, # Static -> auto prompt caching
+                {"role": "user", "content": user_content}
+            ],
             temperature=0.1, # Lower temperature for more deterministic output
-            response_format={ "type": "json_object" } # If supported by model
+            response_format=_openai_response_format(schema) # Constrained decoding
         )
         content = response.choices[0].message.content
-        # Ensure JSON parsing is robust
-        return json.loads(content.strip())
+        return _parse_json_from_llm(content)
     except Exception as e:
         print(f"Error calling OpenAI API: {e}")
-        # Try to parse JSON even if response_format failed
-        try:
-            # Find JSON block if there's extra text (common issue)
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            if json_start != -1 and json_end != -1:
-                 return json.loads(content[json_start:json_end])
-        except Exception as json_e:
-             print(f"Error parsing OpenAI JSON response: {json_e}. Content: {content}")
-             return None # Indicate failure
+        # Try to parse whatever content arrived even if the call errored late
+        return _parse_json_from_llm(content)
 
 
-def call_gemini_api(prompt):
+def call_gemini_api(instructions, user_content, schema=None, model=None):
     import google.generativeai as genai
     genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-    model = genai.GenerativeModel('gemini-pro') # Or 'gemini-1.5-pro-latest'
+    # system_instruction keeps the static block out of the per-call content
+    model = genai.GenerativeModel(model or LLM_MODEL_MAP["Gemini"], system_instruction=instructions)
     try:
-        # Gemini might need specific configuration for JSON output guarantee
-        # generation_config = genai.types.GenerationConfig(response_mime_type="application/json") # Check latest SDK
-        response = model.generate_content(prompt) # Add generation_config= if available
-        content = response.text
-        # Gemini response might need cleaning before JSON parsing
-        json_start = content.find('{')
-        json_end = content.rfind('}') + 1
-        if json_start != -1 and json_end != -1:
-            return json.loads(content[json_start:json_end].strip())
-        else:
-            print(f"Could not find JSON in Gemini response: {content}")
-            return None
+        generation_config = None
+        if schema:
+            # response_schema constrains Gemini to emit matching JSON directly
+            generation_config = genai.GenerationConfig(
+                response_mime_type="application/json", response_schema=_gemini_schema(schema))
+        response = _call_with_retries(model.generate_content, user_content,
+                                      generation_config=generation_config)
+        # Parse (repair path only matters when no schema was applied)
+        return _parse_json_from_llm(response.text)
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
         return None
 
-def call_claude_api(prompt):
+def _claude_request_kwargs(instructions, user_content, schema, model=None):
+    """Shared request payload for the sync and async Claude calls."""
+    # A batch response carries one entry (~100-150 tokens) per keyword, so
+    # the single-keyword budget of 500 would truncate the forced tool_use
+    # input and push every keyword into the individual-call fallback.
+    max_tokens = 4096 if schema is BATCH_GROUPING_SCHEMA else 500
+    kwargs = dict(
+        model=model or LLM_MODEL_MAP["Claude"],
+        max_tokens=max_tokens,
+        temperature=0.1,
+        # cache_control marks the static block for Anthropic prompt caching
+        system=[{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}],
+        messages=[{"role": "user", "content": user_content}]
+    )
+    if schema:
+        # Forced tool use constrains Claude to emit schema-valid JSON
+        kwargs["tools"] = [{
+            "name": "record_grouping",
+            "description": "Records the semantic keyword grouping result.",
+            "input_schema": schema,
+        }]
+        kwargs["tool_choice"] = {"type": "tool", "name": "record_grouping"}
+    return kwargs
+
+def _parse_claude_response(response, schema):
+    """Extracts the grouping from a Claude response (tool input or text)."""
+    if schema:
+        for block in response.content:
+            if getattr(block, "type", None) == "tool_use":
+                return block.input
+        print(f"No tool_use block in Claude response: {response.content}")
+        return None
+    # Claude might wrap JSON in markdown or other text
+    return _parse_json_from_llm(response.content[0].text)
+
+def call_claude_api(instructions, user_content, schema=None, model=None):
     from anthropic import Anthropic
     client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
     try:
-        response = client.messages.create(
-            model="claude-3-opus-20240229", # Or Sonnet/Haiku
-            max_tokens=500, # Adjust as needed
-            temperature=0.1,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        content = response.content[0].text
-        # Claude might wrap JSON in markdown or other text
-        json_start = content.find('{')
-        json_end = content.rfind('}') + 1
-        if json_start != -1 and json_end != -1:
-            return json.loads(content[json_start:json_end].strip())
-        else:
-            print(f"Could not find JSON in Claude response: {content}")
-            return None
+        response = _call_with_retries(client.messages.create,
+                                      **_claude_request_kwargs(instructions, user_content, schema, model))
+        return _parse_claude_response(response, schema)
     except Exception as e:
         print(f"Error calling Claude API: {e}")
         return None
 
-def call_mistral_api(prompt):
-    # Option 1: Using MistralAI client (if installed via 'pip install mistralai')
-    # from mistralai.client import MistralClient
-    # from mistralai.models.chat_completion import ChatMessage
-    # client = MistralClient(api_key=os.getenv("MISTRAL_API_KEY"))
-    # model = "mistral-large-latest" # Or other Mistral model
-    # messages = [ChatMessage(role="user", content=prompt)]
-    # try:
-    #     response = client.chat(model=model, messages=messages, temperature=0.1)
-    #     content = response.choices[0].message.content
-    #     # Parse JSON robustly
-    #     # ... (similar JSON finding logic as above) ...
-    # except Exception as e:
-    #     print(f"Error calling Mistral API: {e}")
-    #     return None
-
-    # Option 2: Using OpenAI client with Mistral via compatible endpoint (e.g., TogetherAI)
+def call_mistral_api(instructions, user_content, schema=None, model=None):
+    # schema is accepted for dispatch symmetry but unused: OpenAI-compatible
+    # Mistral endpoints generally don't support strict json_schema, so this
+    # path relies on the _parse_json_from_llm repair fallback.
+    # Uses the OpenAI client with Mistral via a compatible endpoint (e.g. TogetherAI).
     # Ensure MISTRAL_API_KEY is set (even if it's an OpenAI-format key for the endpoint)
-    # and OPENAI_API_BASE is set in .env or environment pointing to the compatible endpoint
+    # and MISTRAL_API_BASE_URL points to the compatible endpoint.
     from openai import OpenAI
     client = OpenAI(
         api_key=os.getenv("MISTRAL_API_KEY"), # Or specific key for the endpoint
         base_url=os.getenv("MISTRAL_API_BASE_URL") # e.g., "https://api.together.xyz/v1"
     )
     try:
-        response = client.chat.completions.create(
-            model="mistralai/Mistral-7B-Instruct-v0.1", # Or specific model name on the platform
-            messages=[{"role": "user", "content": prompt}],
+        response = _call_with_retries(client.chat.completions.create,
+            model=model or LLM_MODEL_MAP["Mistral"], # Model name as known to the endpoint
+            messages=[
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": user_content}
+            ],
             temperature=0.1,
             # May or may not support response_format JSON
         )
-        content = response.choices[0].message.content
         # Parse JSON robustly
-        json_start = content.find('{')
-        json_end = content.rfind('}') + 1
-        if json_start != -1 and json_end != -1:
-            return json.loads(content[json_start:json_end].strip())
-        else:
-             print(f"Could not find JSON in Mistral (OpenAI Compatible) response: {content}")
-             return None
+        return _parse_json_from_llm(response.choices[0].message.content)
     except Exception as e:
         print(f"Error calling Mistral API (OpenAI Compatible): {e}")
         return None
 
 
-def get_llm_grouping(keyword, language, llm_choice, custom_prompt_template):
+# --- Batch API support (OpenAI) ---
+# For large runs the workload is a classic offline batch: hundreds of
+# independent short prompts with an identical schema. The Batch API is ~50%
+# cheaper than live chat.completions and accepts up to 50k requests per job.
+# Results arrive within the completion window (usually much sooner), so app.py
+# exposes this as an opt-in "Batch mode" with a status check button.
+
+def submit_batch_openai(keywords, language, prompt_template, model=None):
+    """Submits one OpenAI Batch job covering all given keywords.
+
+    Returns the batch id to poll with get_batch_status_openai /
+    fetch_batch_results_openai.
+    """
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    instructions = build_system_instructions(prompt_template)
+    lines = []
+    for i, keyword in enumerate(keywords):
+        # custom_id has a length limit, so use an index and map back on fetch
+        request = {
+            "custom_id": f"kw-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model or LLM_MODEL_MAP["OpenAI"],
+                "messages": [
+                    {"role": "system", "content": instructions},
+                    {"role": "user", "content": build_user_content(keyword, language)}
+                ],
+                "temperature": 0.1,
+                "response_format": _openai_response_format(GROUPING_SCHEMA),
+            },
+        }
+        lines.append(json.dumps(request))
+
+    payload = ("\n".join(lines) + "\n").encode('utf-8')
+    batch_file = client.files.create(file=("keyword_batch.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+def get_batch_status_openai(batch_id):
+    """Returns the current status string of a batch job (e.g. 'completed')."""
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client.batches.retrieve(batch_id).status
+
+def fetch_batch_results_openai(batch_id, keywords):
+    """Downloads a completed batch's output and maps results back to keywords.
+
+    Returns a dict of keyword -> parsed grouping dict (or None on a per-line
+    parse/API failure). `keywords` must be the same list, in the same order,
+    that was passed to submit_batch_openai.
+    """
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise ValueError(f"Batch {batch_id} is not completed (status: {batch.status})")
+
+    output = client.files.content(batch.output_file_id).text
+    results = {kw: None for kw in keywords}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = _loads(line)
+            index = int(entry["custom_id"].split("-", 1)[1])
+            keyword = keywords[index]
+            content = entry["response"]["body"]["choices"][0]["message"]["content"]
+            results[keyword] = _parse_json_from_llm(content)
+        except Exception as e:
+            print(f"Error parsing batch output line: {e}. Line: {line[:200]}")
+    return results
+
+
+# --- Async variants of the API calls ---
+# Used by the concurrent processing loop in app.py (asyncio.gather + semaphore).
+# Keep these in sync with the blocking versions above.
+
+async def acall_openai_api(instructions, user_content, schema=None, model=None):
+    client = _async_openai_client() # Shared client + HTTP/2 connection pool
+    content = None
+    try:
+        response = await _acall_with_retries(client.chat.completions.create,
+            model=model or LLM_MODEL_MAP["OpenAI"],
+            messages=[
+                {"role": "system", "content": instructions}, # Static -> auto prompt caching
+                {"role": "user", "content": user_content}
+            ],
+            temperature=0.1, # Lower temperature for more deterministic output
+            response_format=_openai_response_format(schema) # Constrained decoding
+        )
+        content = response.choices[0].message.content
+        return _parse_json_from_llm(content)
+    except Exception as e:
+        print(f"Error calling OpenAI API (async): {e}")
+        # Try to parse whatever content arrived even if the call errored late
+        return _parse_json_from_llm(content)
+
+
+async def acall_gemini_api(instructions, user_content, schema=None, model=None):
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    model = genai.GenerativeModel(model or LLM_MODEL_MAP["Gemini"], system_instruction=instructions)
+    try:
+        generation_config = None
+        if schema:
+            generation_config = genai.GenerationConfig(
+                response_mime_type="application/json", response_schema=_gemini_schema(schema))
+        response = await _acall_with_retries(model.generate_content_async, user_content,
+                                             generation_config=generation_config)
+        # Parse (repair path only matters when no schema was applied)
+        return _parse_json_from_llm(response.text)
+    except Exception as e:
+        print(f"Error calling Gemini API (async): {e}")
+        return None
+
+async def acall_claude_api(instructions, user_content, schema=None, model=None):
+    client = _async_anthropic_client() # Shared client + HTTP/2 connection pool
+    try:
+        response = await _acall_with_retries(client.messages.create,
+                                             **_claude_request_kwargs(instructions, user_content, schema, model))
+        return _parse_claude_response(response, schema)
+    except Exception as e:
+        print(f"Error calling Claude API (async): {e}")
+        return None
+
+async def acall_mistral_api(instructions, user_content, schema=None, model=None):
+    # schema unused; see call_mistral_api
+    # Uses the OpenAI async client against a Mistral-compatible endpoint,
+    # mirroring the blocking call_mistral_api above.
+    client = _async_mistral_client() # Shared client + HTTP/2 connection pool
+    try:
+        response = await _acall_with_retries(client.chat.completions.create,
+            model=model or LLM_MODEL_MAP["Mistral"], # Model name as known to the endpoint
+            messages=[
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": user_content}
+            ],
+            temperature=0.1,
+        )
+        # Parse JSON robustly
+        return _parse_json_from_llm(response.choices[0].message.content)
+    except Exception as e:
+        print(f"Error calling Mistral API (async, OpenAI Compatible): {e}")
+        return None
+
+
+_ACALL_DISPATCH = {
+    "OpenAI": lambda *a: acall_openai_api(*a),
+    "Gemini": lambda *a: acall_gemini_api(*a),
+    "Claude": lambda *a: acall_claude_api(*a),
+    "Mistral": lambda *a: acall_mistral_api(*a),
+}
+
+async def _acall_llm(llm_choice, instructions, user_content, schema=None, model=None):
+    """Dispatches one async LLM call through the provider's rate limiter.
+
+    If LLM_FAILOVER providers are configured and the selected provider still
+    returns nothing after its retries, the same prompt is transparently
+    retried with the next provider in the list. `model` only applies to the
+    selected provider; failover providers use their own defaults.
+    """
+    if llm_choice not in _ACALL_DISPATCH:
+        raise ValueError("Invalid LLM choice")
+    providers = [llm_choice] + [p for p in _FAILOVER_ORDER if p != llm_choice and p in _ACALL_DISPATCH]
+
+    for provider in providers:
+        call = _ACALL_DISPATCH[provider]
+        provider_model = model if provider == llm_choice else None
+        limiter = _get_limiter(provider)
+        if limiter is None:
+            result = await call(instructions, user_content, schema, provider_model)
+        else:
+            async with limiter: # Waits only when the RPM budget is exhausted
+                result = await call(instructions, user_content, schema, provider_model)
+        if result is not None:
+            return result
+        if provider != providers[-1]:
+            print(f"Provider '{provider}' failed; failing over to the next provider.")
+    return None
+
+
+async def aget_llm_grouping(keyword, language, llm_choice, custom_prompt_template, model=None):
+    """Async version of get_llm_grouping for concurrent processing."""
+    instructions = build_system_instructions(custom_prompt_template)
+    user_content = build_user_content(keyword, language)
+    return await _acall_llm(llm_choice, instructions, user_content, GROUPING_SCHEMA, model)
+
+
+def get_llm_grouping(keyword, language, llm_choice, custom_prompt_template, model=None):
     """Gets grouping from the selected LLM."""
-    # Format the final prompt sent to the API
-    prompt = custom_prompt_template.format(keyword=keyword, language=language)
+    instructions = build_system_instructions(custom_prompt_template)
+    user_content = build_user_content(keyword, language)
 
     if llm_choice == "OpenAI":
-        return call_openai_api(prompt)
+        return call_openai_api(instructions, user_content, GROUPING_SCHEMA, model)
     elif llm_choice == "Gemini":
-        return call_gemini_api(prompt)
+        return call_gemini_api(instructions, user_content, GROUPING_SCHEMA, model)
     elif llm_choice == "Claude":
-        return call_claude_api(prompt)
+        return call_claude_api(instructions, user_content, GROUPING_SCHEMA, model)
     elif llm_choice == "Mistral":
-        return call_mistral_api(prompt)
+        return call_mistral_api(instructions, user_content, GROUPING_SCHEMA, model)
     else:
-        raise ValueError("Invalid LLM choice")
\ No newline at end of file
+        raise ValueError("Invalid LLM choice")
+
+
+# --- Batch prompting (multiple keywords per call) ---
+# A large share of per-call latency and token cost is the fixed instruction
+# block and the network round-trip, both of which are identical for every
+# keyword. Packing N keywords into one prompt amortizes that overhead ~N-fold.
+
+# The output contract appended after the user's rendered template for batch
+# calls. It comes last so it overrides the single-object JSON format the
+# default template asks for.
+_BATCH_OUTPUT_CONTRACT = """You will receive a language and a numbered list of keywords. Apply the instructions above to EACH keyword independently.
+Instead of the single-keyword output format described above, provide the output ONLY in the following JSON format, with exactly one entry per keyword, in the same order, and no extra text before or after the JSON block:
+{
+  "results": [
+    {"index": 1, "main_cat": "...", "sub_cat_1": "...", "sub_cat_2": "...", "semantic_theme": "..."},
+    {"index": 2, "main_cat": "...", "sub_cat_1": "...", "sub_cat_2": "...", "semantic_theme": "..."}
+  ]
+}"""
+
+def build_batch_instructions(custom_prompt_template):
+    """Renders the user's template into the batch instruction block.
+
+    The user's analysis instructions (including sidebar prompt tuning) apply
+    to each keyword in the list; only the output format is replaced by the
+    batch "results" array contract. Like the single-keyword path, the result
+    is byte-identical across calls within a run, which is all provider-side
+    prompt caching needs.
+    """
+    rendered = custom_prompt_template.format(
+        keyword="(each keyword in the numbered list in the user message)",
+        language="(see the user message)"
+    )
+    return f"{rendered}\n\n{_BATCH_OUTPUT_CONTRACT}"
+
+def build_batch_user_content(keywords, language):
+    """The per-call variable part of a batch prompt: language + numbered list."""
+    numbered = "\n".join(f"{i + 1}. {kw}" for i, kw in enumerate(keywords))
+    return f"Language: {language}\nKeywords:\n{numbered}"
+
+async def aget_llm_grouping_batch(keywords, language, llm_choice, custom_prompt_template, model=None):
+    """Classifies a batch of keywords in one LLM call.
+
+    Returns a dict of keyword -> grouping dict (or None if that keyword could
+    not be classified). Keywords missing or malformed in the batch response
+    fall back to individual single-keyword calls.
+    """
+    instructions = build_batch_instructions(custom_prompt_template)
+    user_content = build_batch_user_content(keywords, language)
+    response = await _acall_llm(llm_choice, instructions, user_content, BATCH_GROUPING_SCHEMA, model)
+
+    results = {kw: None for kw in keywords}
+    if response and isinstance(response, dict):
+        for entry in response.get("results", []):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry["index"])
+            except (KeyError, ValueError, TypeError):
+                continue # Malformed index; keyword falls back below
+            if not 1 <= index <= len(keywords):
+                continue # Out-of-range (e.g. 0-based) index must not wrap around
+            if not all(field in entry for field in GROUPING_SCHEMA["required"]):
+                continue # Incomplete entry; keyword falls back below
+            results[keywords[index - 1]] = entry
+
+    # Fall back to single-keyword calls for anything the batch didn't cover
+    for keyword, result in results.items():
+        if result is None:
+            print(f"Batch response missing/invalid for '{keyword}'; retrying individually.")
+            results[keyword] = await aget_llm_grouping(keyword, language, llm_choice, custom_prompt_template, model)
+    return results